@@ -6,6 +6,8 @@ from typing import Optional
 
 from charms.operator_libs_linux.v0 import apt
 
+CANDIDATE_MATCHER = re.compile(r"^Candidate:\s(?P<version>(.*))")
+
 
 def get_candidate_version(package: str) -> Optional[str]:
     """Get candidate version of package from apt-cache.
@@ -21,8 +23,7 @@ def get_candidate_version(package: str) -> Optional[str]:
 
     lines = [line.strip() for line in output.strip().split("\n")]
     for line in lines:
-        candidate_matcher = re.compile(r"^Candidate:\s(?P<version>(.*))")
-        matches = candidate_matcher.search(line)
+        matches = CANDIDATE_MATCHER.search(line)
         if matches:
             return matches.groupdict().get("version")
     raise apt.PackageError(f"Could not find candidate version package in apt-cache: {output}")
@@ -115,17 +115,18 @@ class HardwareObserverCharm(ops.CharmBase):
     def _on_redetect_hardware(self, event: ops.ActionEvent) -> None:
         """Redetect available hardware tools and option to rerun the install hook."""
         available_tools = detect_available_tools()
+        stored_tools = self.stored_tools
 
-        hw_change_detected = self.stored_tools != available_tools
+        hw_change_detected = stored_tools != available_tools
 
-        sorted_stored_tools = ",".join(map(lambda member: member.value, sorted(self.stored_tools)))
+        sorted_stored_tools = ",".join(map(lambda member: member.value, sorted(stored_tools)))
         sorted_available_tools = ",".join(
             map(lambda member: member.value, sorted(available_tools))
         )
 
         if event.params["apply"] and hw_change_detected:
             # Update the value in local Store
-            self.stored_tools = available_tools
+            self.stored_tools = set(available_tools)
             event.log(f"Run install hook with enable tools: {sorted_available_tools}")
             self._on_install_or_upgrade(event=event)
 
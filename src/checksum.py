@@ -15,7 +15,9 @@
 # For further info, check https://github.com/canonical/charmcraft
 """Checksum definition, check functions and related utils."""
 import hashlib
+import json
 import logging
+import os
 import typing as t
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -25,6 +27,9 @@ from os_platform import Architecture, UbuntuSeries, get_os_platform
 logger = logging.getLogger(__name__)
 
 
+CHECKSUM_CHUNK_SIZE = 1024 * 1024
+
+
 class ResourceChecksumError(Exception):
     """Raise if checksum does not match."""
 
@@ -279,11 +284,49 @@ SAS3IRCU_VERSION_INFOS: t.List[ToolVersionInfo] = [
 ]
 
 
-def validate_checksum(support_version_infos: t.List[ToolVersionInfo], path: Path) -> bool:
+def _file_identity(file_stat: os.stat_result) -> t.Dict[str, int]:
+    """Return the fields of the stat result that identify a version of the file."""
+    return {
+        "size": file_stat.st_size,
+        "mtime_ns": file_stat.st_mtime_ns,
+        "ino": file_stat.st_ino,
+        "dev": file_stat.st_dev,
+    }
+
+
+def _read_checksum_stamp(stamp_path: Path, file_stat: os.stat_result) -> t.Optional[str]:
+    """Return the stamped sha256 of the file if it has not changed since."""
+    try:
+        stamp = json.loads(stamp_path.read_text())
+        if all(stamp[key] == value for key, value in _file_identity(file_stat).items()):
+            return stamp["sha256"]
+    except (OSError, ValueError, KeyError, TypeError) as err:
+        logger.debug("Cannot use checksum stamp %s: %s", stamp_path, err)
+    return None
+
+
+def _write_checksum_stamp(stamp_path: Path, file_stat: os.stat_result, sha256_hash: str) -> None:
+    """Record the sha256 of the file along with its identity."""
+    try:
+        stamp_path.parent.mkdir(parents=True, exist_ok=True)
+        stamp_path.write_text(json.dumps({**_file_identity(file_stat), "sha256": sha256_hash}))
+    except OSError as err:
+        logger.warning("Cannot write checksum stamp %s: %s", stamp_path, err)
+
+
+def validate_checksum(
+    support_version_infos: t.List[ToolVersionInfo],
+    path: Path,
+    stamp_path: t.Optional[Path] = None,
+) -> bool:
     """Validate checksum of resource file by checking with supported versions.
 
     Returns True if resource is supported by the charm, architecture, and
     checksum validation is successful.
+
+    If stamp_path is provided, the sha256 of the file is stored there and
+    reused as long as the size, the modification time, the inode and the
+    device of the file are unchanged.
     """
     os_platform = get_os_platform()
 
@@ -295,7 +338,19 @@ def validate_checksum(support_version_infos: t.List[ToolVersionInfo], path: Path
             supported_checksums.append(info.sha256_checksum)
 
     with open(path, "rb") as f:
-        sha256_hash = hashlib.sha256(f.read()).hexdigest()
+        # The same stat result is used to check and to write the stamp.
+        file_stat = os.fstat(f.fileno())
+        sha256_hash = _read_checksum_stamp(stamp_path, file_stat) if stamp_path else None
+        if sha256_hash is None:
+            sha256 = hashlib.sha256()
+            # The file is read once from start to end, let the kernel read ahead.
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            # Hash by chunks so the resource is never loaded in memory entirely.
+            for chunk in iter(lambda: f.read(CHECKSUM_CHUNK_SIZE), b""):
+                sha256.update(chunk)
+            sha256_hash = sha256.hexdigest()
+            if stamp_path:
+                _write_checksum_stamp(stamp_path, file_stat, sha256_hash)
 
     if sha256_hash in supported_checksums:
         return True
@@ -30,6 +30,7 @@ class HardwareExporterSettings(ExporterSettings):  # pylint: disable = too-few-p
     crash_msg: str = "Hardware exporter crashed unexpectedly, please refer to systemd logs..."
 
     redfish_timeout: int = 10
+    redfish_connect_timeout: int = 5
     redfish_max_retry: int = 2
 
 
@@ -89,5 +90,8 @@ HARDWARE_EXPORTER_COLLECTOR_MAPPING = {
 
 TOOLS_DIR = Path("/usr/sbin")
 
+# Cached checksums of the third party resources
+CHECKSUM_STAMP_DIR = Path("/var/lib/hardware-observer/checksums")
+
 # SNAP environment
 SNAP_COMMON = Path(f"/var/snap/{HARDWARE_EXPORTER_SETTINGS.name}/common")
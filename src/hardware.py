@@ -2,8 +2,10 @@
 
 import json
 import logging
+import re
 import subprocess
 import typing as t
+from functools import lru_cache
 from pathlib import Path
 
 from charms.operator_libs_linux.v0 import apt
@@ -12,6 +14,9 @@ from config import HWTool
 
 logger = logging.getLogger(__name__)
 
+# The BMC can hang, so the ipmi probes are stopped after this many seconds.
+IPMI_PROBE_TIMEOUT = 120
+
 
 LSHW_SUPPORTED_STORAGES = {
     HWTool.SAS2IRCU: [
@@ -34,6 +39,13 @@ LSHW_SUPPORTED_STORAGES = {
     ],
 }
 
+# Precompiled matchers for LSHW_SUPPORTED_STORAGES, so the product
+# string is scanned once per tool instead of once per supported product.
+LSHW_SUPPORTED_STORAGE_PATTERNS: t.Dict[HWTool, "re.Pattern[str]"] = {
+    tool: re.compile("|".join(map(re.escape, products)))
+    for tool, products in LSHW_SUPPORTED_STORAGES.items()
+}
+
 HWINFO_SUPPORTED_STORAGES = {
     HWTool.SSACLI: [
         [
@@ -46,17 +58,19 @@ HWINFO_SUPPORTED_STORAGES = {
 }
 
 
-def lshw(class_filter: t.Optional[str] = None) -> t.Any:
-    """Return lshw output as dict."""
-    cmd = "lshw -json"
-    if class_filter:
-        cmd = cmd + " -c " + class_filter
+@lru_cache
+def _lshw_tree() -> t.Any:
+    """Return the full lshw device tree.
+
+    lshw is slow to probe the hardware, so it is run only once per hook
+    and the class filtering is done on the cached tree instead.
+    """
     try:
-        output = subprocess.check_output(cmd.split(), text=True)
+        output = subprocess.check_output("lshw -json".split(), text=True)
         json_output = json.loads(output)
         # lshw has different output on different ubuntu series
         # if class_filter is not provided.
-        if not class_filter and isinstance(json_output, list):
+        if isinstance(json_output, list):
             json_output = json_output[0]
         return json_output
     except subprocess.CalledProcessError as err:
@@ -65,18 +79,36 @@ def lshw(class_filter: t.Optional[str] = None) -> t.Any:
         raise err
 
 
+def _filter_lshw_class(node: t.Dict[str, t.Any], class_filter: str) -> t.List[t.Any]:
+    """Return all the nodes in the lshw tree matching the class."""
+    nodes = [node] if node.get("class") == class_filter else []
+    for child in node.get("children", []):
+        nodes.extend(_filter_lshw_class(child, class_filter))
+    return nodes
+
+
+def lshw(class_filter: t.Optional[str] = None) -> t.Any:
+    """Return lshw output as dict."""
+    tree = _lshw_tree()
+    if not class_filter:
+        return tree
+    return _filter_lshw_class(tree, class_filter)
+
+
 def get_bmc_address() -> t.Optional[str]:
     """Get BMC IP address by ipmitool."""
     apt.add_package("ipmitool", update_cache=False)
     cmd = "ipmitool lan print"
     try:
-        output = subprocess.check_output(cmd.split(), text=True)
+        output = subprocess.check_output(cmd.split(), text=True, timeout=IPMI_PROBE_TIMEOUT)
         for line in output.splitlines():
             values = line.split(":")
             if values[0].strip() == "IP Address":
                 return values[1].strip()
     except subprocess.CalledProcessError:
         logger.debug("IPMI is not available")
+    except subprocess.TimeoutExpired:
+        logger.info("IPMI is not available: BMC timed out")
     return None
 
 
@@ -108,3 +140,12 @@ def hwinfo(*args: str) -> t.Dict[str, str]:
 def is_nvidia_driver_loaded() -> bool:
     """Determine if an NVIDIA driver has been loaded."""
     return Path("/proc/driver/nvidia/version").exists()
+
+
+def is_virtual_machine() -> bool:
+    """Determine if the machine is a virtual machine."""
+    try:
+        subprocess.run(["systemd-detect-virt", "--vm", "--quiet"], check=True)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return False
+    return True
@@ -9,8 +9,10 @@ import shutil
 import stat
 import subprocess
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
 
 import requests
 import urllib3
@@ -29,6 +31,7 @@ from checksum import (
     validate_checksum,
 )
 from config import (
+    CHECKSUM_STAMP_DIR,
     HARDWARE_EXPORTER_SETTINGS,
     SNAP_COMMON,
     TOOLS_DIR,
@@ -39,13 +42,15 @@ from config import (
 )
 from hardware import (
     HWINFO_SUPPORTED_STORAGES,
-    LSHW_SUPPORTED_STORAGES,
+    IPMI_PROBE_TIMEOUT,
+    LSHW_SUPPORTED_STORAGE_PATTERNS,
     get_bmc_address,
     hwinfo,
     is_nvidia_driver_loaded,
+    is_virtual_machine,
     lshw,
 )
-from keys import HP_KEYS
+from keys import HP_KEYS, HP_KEYS_FINGERPRINT
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +58,22 @@ logger = logging.getLogger(__name__)
 # See `redfish_available` function.
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Reuse the connection to the BMC across redfish probes instead of paying
+# for a new TLS handshake on every request.
+_REDFISH_SESSION = requests.Session()
+_REDFISH_SESSION.mount(
+    "https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1)
+)
+
+
+# The probes go through the in-band BMC interface, which handles one request
+# at a time, so they are run sequentially.
+IPMI_PROBES: List[Tuple[HWTool, str, str]] = [
+    (HWTool.IPMI_SENSOR, "ipmimonitoring --sdr-cache-recreate", "IPMI sensors"),
+    (HWTool.IPMI_SEL, "ipmi-sel --sdr-cache-recreate", "IPMI SEL"),
+    (HWTool.IPMI_DCMI, "ipmi-dcmi --get-system-power-statistics", "IPMI DCMI"),
+]
+
 
 class ResourceFileSizeZeroError(Exception):
     """Empty resource error."""
@@ -71,8 +92,19 @@ def copy_to_snap_common_bin(source: Path, filename: str) -> None:
 def symlink(src: Path, dst: Path) -> None:
     """Create softlink."""
     try:
-        dst.unlink(missing_ok=True)  # Remove file if exists
-        dst.symlink_to(src)
+        # Nothing to do if the link is already in place, which is the case
+        # when a tool is reinstalled.
+        if os.readlink(dst) == os.fspath(src):
+            return
+    except OSError:
+        pass
+    # Create the link aside and rename it over dst, so dst is replaced
+    # atomically and never missing.
+    tmp = dst.with_name(f"{dst.name}.tmp")
+    try:
+        tmp.unlink(missing_ok=True)  # Remove leftover from an interrupted run
+        tmp.symlink_to(src)
+        os.replace(tmp, dst)
     except OSError as err:
         logger.exception(err)
         raise
@@ -85,20 +117,53 @@ def file_is_empty(path: Path) -> bool:
 
     Third-party resources are not allowed to be redistributed on Charmhub.
     Therefore, an empty file is uploaded as a resource which the user is expected
-    to replace. This function checks for those empty resource files.
+    to replace. This function checks for those empty resource files. A file
+    which does not exist is treated as empty as well.
     """
-    if path.stat().st_size == 0:
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        logger.info("%s does not exist", path)
+        return True
+    if size == 0:
         logger.info("%s size is 0", path)
         return True
     return False
 
 
+def file_is_executable(path: Path) -> bool:
+    """Check whether file exists and is executable.
+
+    A single stat call is used to check both, the charm runs as root so any
+    execute bit is enough.
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except OSError:
+        return False
+    return bool(mode & (stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH))
+
+
+def _run_dpkg(cmd: List[str]) -> None:
+    """Run dpkg command.
+
+    The output is only captured when it is going to be logged.
+    """
+    result = subprocess.run(
+        cmd,
+        stdout=subprocess.PIPE if logger.isEnabledFor(logging.DEBUG) else subprocess.DEVNULL,
+        universal_newlines=True,
+        check=True,
+    )
+    if result.stdout:
+        logger.debug(result.stdout)
+
+
 def install_deb(name: str, path: Path) -> None:
     """Install local deb package."""
     _cmd: List[str] = ["dpkg", "-i", str(path)]
     try:
-        result = subprocess.check_output(_cmd, universal_newlines=True)
-        logger.debug(result)
+        _run_dpkg(_cmd)
         logger.info("Install deb package %s from %s success", name, path)
     except subprocess.CalledProcessError as exc:
         raise apt.PackageError(f"Fail to install deb {name} from {path}") from exc
@@ -108,8 +173,7 @@ def remove_deb(pkg: str) -> None:
     """Remove deb package."""
     _cmd: List[str] = ["dpkg", "--remove", pkg]
     try:
-        result = subprocess.check_output(_cmd, universal_newlines=True)
-        logger.debug(result)
+        _run_dpkg(_cmd)
         logger.info("Remove deb package %s", pkg)
     except subprocess.CalledProcessError as exc:
         raise apt.PackageError(f"Fail to remove deb {pkg}") from exc
@@ -127,14 +191,34 @@ def make_executable(src: Path) -> None:
         raise err
 
 
-def check_deb_pkg_installed(pkg: str) -> bool:
-    """Check if debian package is installed."""
-    try:
-        apt.DebianPackage.from_installed_package(pkg)
-        return True
-    except apt.PackageNotFoundError:
+def _installed_deb_pkgs(*pkgs: str) -> Set[str]:
+    """Return the debian packages among pkgs which are installed.
+
+    The packages are looked up with a single dpkg-query call.
+    """
+    result = subprocess.run(
+        ["dpkg-query", "--show", "--showformat=${db:Status-Abbrev} ${Package}\n", *pkgs],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        universal_newlines=True,
+        check=False,
+    )
+    installed = set()
+    for line in result.stdout.splitlines():
+        # e.g. "ii  freeipmi-tools", the second status letter is the current state
+        status, _, name = line.partition(" ")
+        if status[1:2] == "i":
+            installed.add(name.strip())
+    return installed
+
+
+def check_deb_pkg_installed(*pkgs: str) -> bool:
+    """Check if all the debian packages are installed."""
+    installed = _installed_deb_pkgs(*pkgs)
+    missing = [pkg for pkg in pkgs if pkg not in installed]
+    for pkg in missing:
         logger.warning("package %s not found in installed package", pkg)
-    return False
+    return not missing
 
 
 class StrategyABC(metaclass=ABCMeta):  # pylint: disable=R0903
@@ -147,6 +231,10 @@ class StrategyABC(metaclass=ABCMeta):  # pylint: disable=R0903
         """Name."""
         return self._name
 
+    def __str__(self) -> str:
+        """Name of the tool, used when logging the strategy."""
+        return self._name.value
+
     @abstractmethod
     def check(self) -> bool:
         """Check installation status of the tool."""
@@ -170,6 +258,11 @@ class APTStrategyABC(StrategyABC, metaclass=ABCMeta):
 class TPRStrategyABC(StrategyABC, metaclass=ABCMeta):
     """Third party resource strategy class."""
 
+    @property
+    def checksum_stamp(self) -> Path:
+        """Path of the cached checksum of the resource."""
+        return CHECKSUM_STAMP_DIR / f"{self.name.value}.json"
+
     @abstractmethod
     def install(self, path: Path) -> None:
         """Installation details."""
@@ -179,6 +272,16 @@ class TPRStrategyABC(StrategyABC, metaclass=ABCMeta):
         """Remove details."""
 
 
+@lru_cache(maxsize=1)
+def _snap_cache() -> snap.SnapCache:
+    """Return the snap cache shared by the snap strategies.
+
+    Loading the snap cache queries snapd for every installed snap, so it is
+    built once and cleared whenever a snap is installed or removed.
+    """
+    return snap.SnapCache()
+
+
 class SnapStrategy(StrategyABC):
     """Snap strategy class."""
 
@@ -197,11 +300,12 @@ class SnapStrategy(StrategyABC):
     @property
     def snap_client(self) -> snap.Snap:
         """Return the snap client."""
-        return snap.SnapCache()[self.snap_name]
+        return _snap_cache()[self.snap_name]
 
     def install(self) -> None:
         """Install the snap from a channel."""
         try:
+            _snap_cache.cache_clear()
             snap.add(self.snap_name, channel=self.channel)
             logger.info("Installed %s from channel: %s", self.snap_name, self.channel)
 
@@ -216,6 +320,7 @@ class SnapStrategy(StrategyABC):
     def remove(self) -> None:
         """Remove the snap."""
         try:
+            _snap_cache.cache_clear()
             snap.remove([self.snap_name])
 
         # using the snap.SnapError will result into:
@@ -226,10 +331,7 @@ class SnapStrategy(StrategyABC):
 
     def check(self) -> bool:
         """Check if all services are active."""
-        return all(
-            service.get("active", False)
-            for service in snap.SnapCache()[self.snap_name].services.values()
-        )
+        return all(service.get("active", False) for service in self.snap_client.services.values())
 
 
 class DCGMExporterStrategy(SnapStrategy):
@@ -279,7 +381,7 @@ class StorCLIStrategy(TPRStrategyABC):
         if file_is_empty(path):
             logger.info("Skipping StorCLI resource install since empty file was detected.")
             raise ResourceFileSizeZeroError(tool=self._name, path=path)
-        if not validate_checksum(STORCLI_VERSION_INFOS, path):
+        if not validate_checksum(STORCLI_VERSION_INFOS, path, self.checksum_stamp):
             raise ResourceChecksumError
         install_deb(self.name, path)
         symlink(src=self.origin_path, dst=self.symlink_bin)
@@ -288,11 +390,12 @@ class StorCLIStrategy(TPRStrategyABC):
         """Remove storcli."""
         self.symlink_bin.unlink(missing_ok=True)
         logger.debug("Remove file %s", self.symlink_bin)
+        self.checksum_stamp.unlink(missing_ok=True)
         remove_deb(pkg=self.name)
 
     def check(self) -> bool:
         """Check resource status."""
-        return self.symlink_bin.exists() and os.access(self.symlink_bin, os.X_OK)
+        return file_is_executable(self.symlink_bin)
 
 
 class PercCLIStrategy(TPRStrategyABC):
@@ -307,7 +410,7 @@ class PercCLIStrategy(TPRStrategyABC):
         if file_is_empty(path):
             logger.info("Skipping PERCCLI resource install since empty file was detected.")
             raise ResourceFileSizeZeroError(tool=self._name, path=path)
-        if not validate_checksum(PERCCLI_VERSION_INFOS, path):
+        if not validate_checksum(PERCCLI_VERSION_INFOS, path, self.checksum_stamp):
             raise ResourceChecksumError
         install_deb(self.name, path)
         symlink(src=self.origin_path, dst=self.symlink_bin)
@@ -316,11 +419,12 @@ class PercCLIStrategy(TPRStrategyABC):
         """Remove perccli."""
         self.symlink_bin.unlink(missing_ok=True)
         logger.debug("Remove file %s", self.symlink_bin)
+        self.checksum_stamp.unlink(missing_ok=True)
         remove_deb(pkg=self.name)
 
     def check(self) -> bool:
         """Check resource status."""
-        return self.symlink_bin.exists() and os.access(self.symlink_bin, os.X_OK)
+        return file_is_executable(self.symlink_bin)
 
 
 class SAS2IRCUStrategy(TPRStrategyABC):
@@ -334,7 +438,7 @@ class SAS2IRCUStrategy(TPRStrategyABC):
         if file_is_empty(path):
             logger.info("Skipping SAS2IRCU resource install since empty file was detected.")
             raise ResourceFileSizeZeroError(tool=self._name, path=path)
-        if not validate_checksum(SAS2IRCU_VERSION_INFOS, path):
+        if not validate_checksum(SAS2IRCU_VERSION_INFOS, path, self.checksum_stamp):
             raise ResourceChecksumError
         make_executable(path)
         symlink(src=path, dst=self.symlink_bin)
@@ -343,10 +447,11 @@ class SAS2IRCUStrategy(TPRStrategyABC):
         """Remove sas2ircu."""
         self.symlink_bin.unlink(missing_ok=True)
         logger.debug("Remove file %s", self.symlink_bin)
+        self.checksum_stamp.unlink(missing_ok=True)
 
     def check(self) -> bool:
         """Check resource status."""
-        return self.symlink_bin.exists() and os.access(self.symlink_bin, os.X_OK)
+        return file_is_executable(self.symlink_bin)
 
 
 class SAS3IRCUStrategy(SAS2IRCUStrategy):
@@ -360,7 +465,7 @@ class SAS3IRCUStrategy(SAS2IRCUStrategy):
         if file_is_empty(path):
             logger.info("Skipping SAS3IRCU resource install since empty file was detected.")
             raise ResourceFileSizeZeroError(tool=self._name, path=path)
-        if not validate_checksum(SAS3IRCU_VERSION_INFOS, path):
+        if not validate_checksum(SAS3IRCU_VERSION_INFOS, path, self.checksum_stamp):
             raise ResourceChecksumError
         make_executable(path)
         symlink(src=path, dst=self.symlink_bin)
@@ -385,6 +490,10 @@ class SSACLIStrategy(APTStrategyABC):
 
     def install(self) -> None:
         for key in HP_KEYS:
+            # Importing a key runs gpg, skip the keys already imported.
+            if Path(f"/etc/apt/trusted.gpg.d/{HP_KEYS_FINGERPRINT[key]}.gpg").exists():
+                logger.debug("Skip importing key %s", HP_KEYS_FINGERPRINT[key])
+                continue
             apt.import_key(key)
         self.add_repo()
         apt.add_package(self.pkg, update_cache=True)
@@ -448,9 +557,7 @@ class IPMISELStrategy(IPMIStrategy):
 
     def check(self) -> bool:
         """Check package status."""
-        parent_pkg_installed = super().check()
-        child_pkg_installed = check_deb_pkg_installed(self.ipmiseld_pkg)
-        return parent_pkg_installed and child_pkg_installed
+        return check_deb_pkg_installed(self.freeipmi_pkg, self.ipmiseld_pkg)
 
 
 class IPMIDCMIStrategy(IPMIStrategy):
@@ -475,13 +582,17 @@ class RedFishStrategy(StrategyABC):  # pylint: disable=R0903
 def _raid_hw_verifier_hwinfo() -> Set[HWTool]:
     """Verify if a supported RAID card exists on the machine using the hwinfo command."""
     hwinfo_output = hwinfo("storage")
+    ssacli_storages = HWINFO_SUPPORTED_STORAGES[HWTool.SSACLI]
 
     tools = set()
-    for _, hwinfo_content in hwinfo_output.items():
+    for hwinfo_content in hwinfo_output.values():
         # ssacli
-        for support_storage in HWINFO_SUPPORTED_STORAGES[HWTool.SSACLI]:
-            if all(item in hwinfo_content for item in support_storage):
-                tools.add(HWTool.SSACLI)
+        if any(
+            all(item in hwinfo_content for item in support_storage)
+            for support_storage in ssacli_storages
+        ):
+            tools.add(HWTool.SSACLI)
+            break
     return tools
 
 
@@ -490,43 +601,28 @@ def _raid_hw_verifier_lshw() -> Set[HWTool]:
     lshw_output = lshw()
     system_vendor = lshw_output.get("vendor")
     lshw_storage = lshw(class_filter="storage")
+    sas2ircu_pattern = LSHW_SUPPORTED_STORAGE_PATTERNS[HWTool.SAS2IRCU]
+    sas3ircu_pattern = LSHW_SUPPORTED_STORAGE_PATTERNS[HWTool.SAS3IRCU]
+    ssacli_pattern = LSHW_SUPPORTED_STORAGE_PATTERNS[HWTool.SSACLI]
 
     tools = set()
 
     for info in lshw_storage:
         _id = info.get("id")
-        product = info.get("product")
+        product = info.get("product") or ""
         vendor = info.get("vendor")
         driver = info.get("configuration", {}).get("driver")
         if _id == "sas":
             # sas3ircu
-            if (
-                any(
-                    _product
-                    for _product in LSHW_SUPPORTED_STORAGES[HWTool.SAS3IRCU]
-                    if _product in product
-                )
-                and vendor == StorageVendor.BROADCOM
-            ):
+            if sas3ircu_pattern.search(product) and vendor == StorageVendor.BROADCOM:
                 tools.add(HWTool.SAS3IRCU)
             # sas2ircu
-            if (
-                any(
-                    _product
-                    for _product in LSHW_SUPPORTED_STORAGES[HWTool.SAS2IRCU]
-                    if _product in product
-                )
-                and vendor == StorageVendor.BROADCOM
-            ):
+            if sas2ircu_pattern.search(product) and vendor == StorageVendor.BROADCOM:
                 tools.add(HWTool.SAS2IRCU)
 
         if _id == "raid":
             # ssacli
-            if system_vendor == SystemVendor.HP and any(
-                _product
-                for _product in LSHW_SUPPORTED_STORAGES[HWTool.SSACLI]
-                if _product in product
-            ):
+            if system_vendor == SystemVendor.HP and ssacli_pattern.search(product):
                 tools.add(HWTool.SSACLI)
             # perccli
             elif system_vendor == SystemVendor.DELL:
@@ -538,19 +634,40 @@ def _raid_hw_verifier_lshw() -> Set[HWTool]:
 
 
 def raid_hw_verifier() -> Set[HWTool]:
-    """Verify if the HWTool support RAID card exists on machine."""
-    lshw_tools = _raid_hw_verifier_lshw()
-    hwinfo_tools = _raid_hw_verifier_hwinfo()
-    return lshw_tools | hwinfo_tools
+    """Verify if the HWTool support RAID card exists on machine.
 
+    The lshw scan only walks the cached lshw tree, so it is done first. The
+    slow hwinfo scan can only detect ssacli and is skipped if lshw found it.
+    """
+    if not lshw(class_filter="storage"):
+        logger.info("No storage controller detected, skip RAID verification")
+        return set()
 
-def redfish_available() -> bool:
-    """Check if redfish service is available."""
-    bmc_address = get_bmc_address()
+    tools = _raid_hw_verifier_lshw()
+    if HWTool.SSACLI in tools:
+        return tools
+    return tools | _raid_hw_verifier_hwinfo()
+
+
+def redfish_available(bmc_address: Optional[str]) -> bool:
+    """Check if redfish service is available on the BMC."""
+    if not bmc_address:
+        logger.info("No BMC address, skipping the redfish probe")
+        return False
     health_check_endpoint = f"https://{bmc_address}:443/redfish/v1/"
+    response: Optional[requests.Response] = None
     try:
-        response = requests.get(
-            health_check_endpoint, verify=False, timeout=HARDWARE_EXPORTER_SETTINGS.redfish_timeout
+        # A machine without a reachable BMC should fail on connect, without
+        # waiting for the whole read timeout.
+        response = _REDFISH_SESSION.get(
+            health_check_endpoint,
+            # Passed per request: a session level verify is overridden by
+            # REQUESTS_CA_BUNDLE or CURL_CA_BUNDLE from the environment.
+            verify=False,
+            timeout=(
+                HARDWARE_EXPORTER_SETTINGS.redfish_connect_timeout,
+                HARDWARE_EXPORTER_SETTINGS.redfish_timeout,
+            ),
         )
         response.raise_for_status()
         data = response.json()
@@ -568,42 +685,70 @@ def redfish_available() -> bool:
         logger.error("unexpected error occurs when connecting to redfish: %s", str(e))
     else:
         result = True
+    finally:
+        if response is not None:
+            response.close()
     return result
 
 
-def bmc_hw_verifier() -> Set[HWTool]:
-    """Verify if the ipmi is available on the machine.
+def _ipmi_hw_verifier() -> Set[HWTool]:
+    """Verify which ipmi services are available on the machine.
 
-    Using freeipmi-tools to verify, the package will be removed in removing stage.
+    The SDR cache only needs to be rebuilt once. After a probe rebuilt it
+    successfully, the following probes reuse it. If that probe failed, the
+    cache may be stale or partial, so the next probe rebuilds it again.
     """
     tools = set()
+    sdr_cache_recreated = False
 
-    # Check if ipmi services are available
-    apt_helpers.add_pkg_with_candidate_version("freeipmi-tools")
+    for tool, cmd, service in IPMI_PROBES:
+        args = cmd.split()
+        recreate_sdr_cache = "--sdr-cache-recreate" in args
+        if recreate_sdr_cache and sdr_cache_recreated:
+            args.remove("--sdr-cache-recreate")
+        try:
+            subprocess.run(
+                args,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=True,
+                timeout=IPMI_PROBE_TIMEOUT,
+            )
+            tools.add(tool)
+            sdr_cache_recreated = sdr_cache_recreated or recreate_sdr_cache
+        except subprocess.CalledProcessError:
+            logger.info("%s monitoring is not available", service)
+        except subprocess.TimeoutExpired:
+            logger.info("%s monitoring is not available: BMC timed out", service)
 
-    try:
-        subprocess.check_output("ipmimonitoring --sdr-cache-recreate".split())
-        tools.add(HWTool.IPMI_SENSOR)
-    except subprocess.CalledProcessError:
-        logger.info("IPMI sensors monitoring is not available")
+    return tools
 
-    try:
-        subprocess.check_output("ipmi-sel --sdr-cache-recreate".split())
-        tools.add(HWTool.IPMI_SEL)
-    except subprocess.CalledProcessError:
-        logger.info("IPMI SEL monitoring is not available")
 
-    try:
-        subprocess.check_output("ipmi-dcmi --get-system-power-statistics".split())
-        tools.add(HWTool.IPMI_DCMI)
-    except subprocess.CalledProcessError:
-        logger.info("IPMI DCMI monitoring is not available")
-
-    # Check if RedFish is available
-    if redfish_available():
-        tools.add(HWTool.REDFISH)
-    else:
-        logger.info("Redfish is not available")
+def bmc_hw_verifier() -> Set[HWTool]:
+    """Verify if the ipmi is available on the machine.
+
+    Using freeipmi-tools to verify, the package will be removed in removing stage.
+
+    The redfish probe goes through the network while the ipmi probes use the
+    in-band BMC interface, so they are run concurrently. The ipmi probes are
+    kept sequential, see IPMI_PROBES.
+    """
+    # Check if ipmi services are available, a missing package is expected here
+    if "freeipmi-tools" not in _installed_deb_pkgs("freeipmi-tools"):
+        apt_helpers.add_pkg_with_candidate_version("freeipmi-tools")
+
+    # Getting the BMC address is an in-band request as well, only the https
+    # request to the BMC is overlapped with the ipmi probes.
+    bmc_address = get_bmc_address()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        redfish_future = executor.submit(redfish_available, bmc_address)
+        tools = _ipmi_hw_verifier()
+
+        # Check if RedFish is available
+        if redfish_future.result():
+            tools.add(HWTool.REDFISH)
+        else:
+            logger.info("Redfish is not available")
     return tools
 
 
@@ -632,9 +777,21 @@ def nvidia_gpu_verifier() -> Set[HWTool]:
     return set()
 
 
-def detect_available_tools() -> Set[HWTool]:
-    """Return HWTool detected after checking the hardware."""
-    return raid_hw_verifier() | bmc_hw_verifier() | disk_hw_verifier() | nvidia_gpu_verifier()
+@lru_cache
+def detect_available_tools() -> FrozenSet[HWTool]:
+    """Return HWTool detected after checking the hardware.
+
+    The hardware does not change within a hook, so the result is cached for
+    the lifetime of the process. It is shared by every caller, hence frozen.
+    Across hooks the detected tools are kept in the charm's StoredState.
+    """
+    tools = raid_hw_verifier() | disk_hw_verifier() | nvidia_gpu_verifier()
+    # Virtual machines have no BMC, skip probing it as the ipmi commands
+    # only fail after retrying.
+    if is_virtual_machine():
+        logger.info("Virtual machine detected, skip BMC verification")
+        return frozenset(tools)
+    return frozenset(tools | bmc_hw_verifier())
 
 
 def remove_legacy_smartctl_exporter() -> None:
@@ -643,36 +800,39 @@ def remove_legacy_smartctl_exporter() -> None:
     Workaround for migrating legacy smartctl exporter to snap package.
     """
     name = "smartctl-exporter"
-    smartctl_exporter = Path("opt/SmartCtlExporter/")
     smartctl_exporter_config_path = Path(f"/etc/{name}-config.yaml")
     smartctl_exporter_service_path = Path(f"/etc/systemd/system/{name}.service")
     if smartctl_exporter_service_path.exists():
         systemd.service_stop(name)
         systemd.service_disable(name)
         smartctl_exporter_service_path.unlink()
-    if smartctl_exporter_config_path.exists():
-        smartctl_exporter_config_path.unlink()
-    if smartctl_exporter.exists():
-        shutil.rmtree("/opt/SmartCtlExporter/")
+    # Nothing is left to migrate on most hooks, so don't stat before removing.
+    smartctl_exporter_config_path.unlink(missing_ok=True)
+    shutil.rmtree("/opt/SmartCtlExporter/", ignore_errors=True)
+
+
+# Strategies only hold class level configuration, so a single instance
+# of each is shared by every HWToolHelper.
+_STRATEGIES: Tuple[StrategyABC, ...] = (
+    StorCLIStrategy(),
+    PercCLIStrategy(),
+    SAS2IRCUStrategy(),
+    SAS3IRCUStrategy(),
+    SSACLIStrategy(),
+    IPMISELStrategy(),
+    IPMIDCMIStrategy(),
+    IPMISENSORStrategy(),
+    RedFishStrategy(),
+)
 
 
 class HWToolHelper:
     """Helper to install vendor's or hardware related tools."""
 
     @property
-    def strategies(self) -> List[StrategyABC]:
+    def strategies(self) -> Tuple[StrategyABC, ...]:
         """Define strategies for every tools."""
-        return [
-            StorCLIStrategy(),
-            PercCLIStrategy(),
-            SAS2IRCUStrategy(),
-            SAS3IRCUStrategy(),
-            SSACLIStrategy(),
-            IPMISELStrategy(),
-            IPMIDCMIStrategy(),
-            IPMISENSORStrategy(),
-            RedFishStrategy(),
-        ]
+        return _STRATEGIES
 
     def fetch_tools(  # pylint: disable=W0102
         self,
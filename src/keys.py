@@ -105,3 +105,12 @@ HP_KEYS = [
     HPPUBLICKEY2048,
     HPPUBLICKEY1024,
 ]
+
+# Fingerprints of HP_KEYS, apt.import_key stores each key
+# as /etc/apt/trusted.gpg.d/<fingerprint>.gpg
+HP_KEYS_FINGERPRINT = {
+    HPEPUBLICKEY2048_KEY1: "57446EFDE098E5C934B69C7DC208ADDE26C2B797",
+    HPPUBLICKEY2048_KEY1: "882F7199B20F94BD7E3E690EFADD8D64B1275EA3",
+    HPPUBLICKEY2048: "476DADAC9E647EE27453F2A3B070680A5CE2D476",
+    HPPUBLICKEY1024: "FB410E68CEDF95D066811E95527BC53A2689B887",
+}
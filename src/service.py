@@ -363,11 +363,13 @@ class SnapExporter(BaseExporter):
 
     def enable_and_start(self) -> None:
         """Enable and start the exporter services."""
-        self.snap_client.start(list(self.snap_client.services.keys()), enable=True)
+        snap_client = self.snap_client
+        snap_client.start(list(snap_client.services.keys()), enable=True)
 
     def disable_and_stop(self) -> None:
         """Disable and stop the services."""
-        self.snap_client.stop(list(self.snap_client.services.keys()), disable=True)
+        snap_client = self.snap_client
+        snap_client.stop(list(snap_client.services.keys()), disable=True)
 
     def restart(self) -> None:
         """Restart the exporter daemon."""
@@ -1,3 +1,5 @@
+import json
+import os
 from unittest import mock
 
 from checksum import PERCCLI_VERSION_INFOS, STORCLI_VERSION_INFOS, validate_checksum
@@ -25,6 +27,14 @@ class TestCheckFileSum:
         ok = validate_checksum(PERCCLI_VERSION_INFOS, target)
         assert ok
 
+    @mock.patch("checksum.os.posix_fadvise")
+    def test_validate_checksum_sequential_read(self, mock_posix_fadvise, tmp_path):
+        target = tmp_path / "perccli"
+        target.write_text("fake file")
+
+        validate_checksum(PERCCLI_VERSION_INFOS, target)
+        mock_posix_fadvise.assert_called_once_with(mock.ANY, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
     @mock.patch(
         "checksum.get_os_platform",
         return_value=OSPlatform(
@@ -78,3 +88,156 @@ class TestCheckFileSum:
 
         ok = validate_checksum(PERCCLI_VERSION_INFOS, target)
         assert not ok
+
+
+class TestChecksumStamp:
+    @mock.patch(
+        "checksum.get_os_platform",
+        return_value=OSPlatform(
+            release="20.04",
+            machine="x86_64",
+        ),
+    )
+    def test_validate_checksum_write_stamp(self, mock_get_os_platform, tmp_path):
+        target = tmp_path / "perccli"
+        target.write_text("fake file")
+        stamp = tmp_path / "stamps" / "perccli.json"
+
+        ok = validate_checksum(PERCCLI_VERSION_INFOS, target, stamp)
+        assert not ok
+
+        content = json.loads(stamp.read_text())
+        assert content["size"] == target.stat().st_size
+        assert content["mtime_ns"] == target.stat().st_mtime_ns
+        assert content["ino"] == target.stat().st_ino
+        assert content["dev"] == target.stat().st_dev
+        assert content["sha256"] == (
+            "aeab675e3a59bbb8cfab620ea88cdac504bfedcd78989766669474a2d7599dd8"
+        )
+
+    @mock.patch(
+        "checksum.get_os_platform",
+        return_value=OSPlatform(
+            release="20.04",
+            machine="x86_64",
+        ),
+    )
+    @mock.patch("checksum.hashlib.sha256")
+    def test_validate_checksum_use_stamp(self, mock_sha256, mock_get_os_platform, tmp_path):
+        target = tmp_path / "perccli"
+        target.write_text("fake file")
+        stamp = tmp_path / "perccli.json"
+        stamp.write_text(
+            json.dumps(
+                {
+                    "size": target.stat().st_size,
+                    "mtime_ns": target.stat().st_mtime_ns,
+                    "ino": target.stat().st_ino,
+                    "dev": target.stat().st_dev,
+                    "sha256": PERCCLI_VERSION_INFOS[0].sha256_checksum,
+                }
+            )
+        )
+
+        ok = validate_checksum(PERCCLI_VERSION_INFOS, target, stamp)
+        assert ok
+        mock_sha256.assert_not_called()
+
+    @mock.patch(
+        "checksum.get_os_platform",
+        return_value=OSPlatform(
+            release="20.04",
+            machine="x86_64",
+        ),
+    )
+    @mock.patch("checksum.hashlib.sha256")
+    def test_validate_checksum_outdated_stamp(self, mock_sha256, mock_get_os_platform, tmp_path):
+        mock_sha256.return_value.hexdigest.return_value = "new-hash"
+        target = tmp_path / "perccli"
+        target.write_text("fake file")
+        stamp = tmp_path / "perccli.json"
+        stamp.write_text(
+            json.dumps(
+                {
+                    "size": 0,
+                    "mtime_ns": target.stat().st_mtime_ns,
+                    "ino": target.stat().st_ino,
+                    "dev": target.stat().st_dev,
+                    "sha256": PERCCLI_VERSION_INFOS[0].sha256_checksum,
+                }
+            )
+        )
+
+        ok = validate_checksum(PERCCLI_VERSION_INFOS, target, stamp)
+        assert not ok
+        mock_sha256.assert_called_once()
+        assert json.loads(stamp.read_text())["sha256"] == "new-hash"
+
+    @mock.patch(
+        "checksum.get_os_platform",
+        return_value=OSPlatform(
+            release="20.04",
+            machine="x86_64",
+        ),
+    )
+    @mock.patch("checksum.hashlib.sha256")
+    def test_validate_checksum_replaced_file(self, mock_sha256, mock_get_os_platform, tmp_path):
+        mock_sha256.return_value.hexdigest.return_value = "new-hash"
+        target = tmp_path / "perccli"
+        target.write_text("fake file")
+        stamp = tmp_path / "perccli.json"
+        # same size and modification time, but another file
+        stamp.write_text(
+            json.dumps(
+                {
+                    "size": target.stat().st_size,
+                    "mtime_ns": target.stat().st_mtime_ns,
+                    "ino": target.stat().st_ino + 1,
+                    "dev": target.stat().st_dev,
+                    "sha256": PERCCLI_VERSION_INFOS[0].sha256_checksum,
+                }
+            )
+        )
+
+        ok = validate_checksum(PERCCLI_VERSION_INFOS, target, stamp)
+        assert not ok
+        mock_sha256.assert_called_once()
+
+    def test_validate_checksum_invalid_stamp(self, tmp_path):
+        target = tmp_path / "perccli"
+        target.write_text("fake file")
+        stamp = tmp_path / "perccli.json"
+        stamp.write_text("not json")
+
+        ok = validate_checksum(PERCCLI_VERSION_INFOS, target, stamp)
+        assert not ok
+        assert json.loads(stamp.read_text())["size"] == target.stat().st_size
+
+    def test_validate_checksum_stamp_not_writable(self, tmp_path):
+        target = tmp_path / "perccli"
+        target.write_text("fake file")
+        # parent of the stamp is a file, so the stamp cannot be created
+        stamp = target / "perccli.json"
+
+        ok = validate_checksum(PERCCLI_VERSION_INFOS, target, stamp)
+        assert not ok
+        assert not stamp.exists()
+
+
+@mock.patch(
+    "checksum.get_os_platform",
+    return_value=OSPlatform(
+        release="20.04",
+        machine="x86_64",
+    ),
+)
+@mock.patch("checksum.CHECKSUM_CHUNK_SIZE", 4)
+def test_validate_checksum_by_chunks(mock_get_os_platform, tmp_path):
+    target = tmp_path / "perccli"
+    target.write_text("fake file")
+    stamp = tmp_path / "perccli.json"
+
+    validate_checksum(PERCCLI_VERSION_INFOS, target, stamp)
+    assert json.loads(stamp.read_text())["sha256"] == (
+        "aeab675e3a59bbb8cfab620ea88cdac504bfedcd78989766669474a2d7599dd8"
+    )
@@ -1,10 +1,20 @@
+import json
 import subprocess
 import unittest
 from unittest import mock
 
 import pytest
 
-from hardware import get_bmc_address, hwinfo, is_nvidia_driver_loaded, lshw
+from hardware import (
+    LSHW_SUPPORTED_STORAGE_PATTERNS,
+    LSHW_SUPPORTED_STORAGES,
+    _lshw_tree,
+    get_bmc_address,
+    hwinfo,
+    is_nvidia_driver_loaded,
+    is_virtual_machine,
+    lshw,
+)
 
 
 class TestHwinfo:
@@ -91,24 +101,49 @@ class TestHwinfo:
 
 
 class TestLshw(unittest.TestCase):
+    def setUp(self):
+        _lshw_tree.cache_clear()
+        self.addCleanup(_lshw_tree.cache_clear)
+
     @mock.patch("hardware.apt")
     @mock.patch("hardware.subprocess.check_output")
     def test_lshw_output(self, mock_subprocess, mock_apt):
-        mock_subprocess.return_value = """[{"expected_output": 1}]"""
-        for class_filter in [None, "storage"]:
-            output = lshw(class_filter)
-            if class_filter is not None:
-                mock_subprocess.assert_called_with(
-                    f"lshw -json -c {class_filter}".split(),
-                    text=True,
-                )
-                self.assertEqual(output, [{"expected_output": 1}])
-            else:
-                mock_subprocess.assert_called_with(
-                    "lshw -json".split(),
-                    text=True,
-                )
-                self.assertEqual(output, {"expected_output": 1})
+        mock_subprocess.return_value = json.dumps(
+            [
+                {
+                    "id": "machine",
+                    "class": "system",
+                    "children": [
+                        {
+                            "id": "core",
+                            "class": "bus",
+                            "children": [
+                                {"id": "sas", "class": "storage"},
+                                {
+                                    "id": "raid",
+                                    "class": "storage",
+                                    "children": [{"id": "disk", "class": "disk"}],
+                                },
+                            ],
+                        }
+                    ],
+                }
+            ]
+        )
+        output = lshw()
+        self.assertEqual(output["id"], "machine")
+
+        output = lshw("storage")
+        self.assertEqual([node["id"] for node in output], ["sas", "raid"])
+
+        output = lshw("disk")
+        self.assertEqual(output, [{"id": "disk", "class": "disk"}])
+
+        output = lshw("display")
+        self.assertEqual(output, [])
+
+        # lshw is only executed once and the filtering is done on the cached tree
+        mock_subprocess.assert_called_once_with("lshw -json".split(), text=True)
 
     @mock.patch("hardware.subprocess.check_output")
     def test_lshw_dict_output(self, mock_subprocess):
@@ -174,9 +209,44 @@ class TestGetBMCAddress(unittest.TestCase):
         output = get_bmc_address()
         self.assertEqual(output, None)
 
+    @mock.patch("hardware.apt")
+    @mock.patch(
+        "hardware.subprocess.check_output",
+        side_effect=subprocess.TimeoutExpired("cmd", 120),
+    )
+    def test_get_bmc_address_timeout(self, mock_check_output, mock_apt):
+        output = get_bmc_address()
+        self.assertEqual(output, None)
+        mock_check_output.assert_called_once_with(
+            ["ipmitool", "lan", "print"], text=True, timeout=120
+        )
+
 
 @pytest.mark.parametrize("path_exists,expected", [(True, True), (False, False)])
 @mock.patch("hardware.Path.exists")
 def test_is_nvidia_driver_loaded(mock_path, path_exists, expected):
     mock_path.return_value = path_exists
     assert is_nvidia_driver_loaded() == expected
+
+
+@pytest.mark.parametrize("tool", list(LSHW_SUPPORTED_STORAGES))
+def test_lshw_supported_storage_patterns(tool):
+    pattern = LSHW_SUPPORTED_STORAGE_PATTERNS[tool]
+    for product in LSHW_SUPPORTED_STORAGES[tool]:
+        assert pattern.search(f"XXX {product} XXX")
+    assert not pattern.search("unsupported product")
+
+
+@pytest.mark.parametrize(
+    "side_effect,expected",
+    [
+        (None, True),
+        (subprocess.CalledProcessError(1, "cmd"), False),
+        (FileNotFoundError(), False),
+    ],
+)
+@mock.patch("hardware.subprocess.run")
+def test_is_virtual_machine(mock_run, side_effect, expected):
+    mock_run.side_effect = side_effect
+    assert is_virtual_machine() == expected
+    mock_run.assert_called_once_with(["systemd-detect-virt", "--vm", "--quiet"], check=True)
@@ -1,5 +1,7 @@
+import os
 import stat
 import subprocess
+import tempfile
 import unittest
 from pathlib import Path
 from unittest import mock
@@ -39,12 +41,14 @@ from hw_tools import (
     TPRStrategyABC,
     _raid_hw_verifier_hwinfo,
     _raid_hw_verifier_lshw,
+    _snap_cache,
     bmc_hw_verifier,
     check_deb_pkg_installed,
     copy_to_snap_common_bin,
     detect_available_tools,
     disk_hw_verifier,
     file_is_empty,
+    file_is_executable,
     install_deb,
     make_executable,
     nvidia_gpu_verifier,
@@ -54,7 +58,7 @@ from hw_tools import (
     remove_legacy_smartctl_exporter,
     symlink,
 )
-from keys import HP_KEYS
+from keys import HP_KEYS, HP_KEYS_FINGERPRINT
 
 
 def get_mock_path(size: int):
@@ -78,31 +82,77 @@ def test_copy_to_snap_common_bin(mock_path, mock_shutil):
     mock_path_obj.mkdir.assert_called()
 
 
-@mock.patch("hw_tools.apt")
-def test_check_deb_pkg_installed_okay(mock_apt):
-    mock_pkg = "ipmitool"
-    result = check_deb_pkg_installed(mock_pkg)
-    assert result is True
+@pytest.mark.parametrize(
+    "pkgs, dpkg_query_output, expect",
+    [
+        (["ipmitool"], "ii  ipmitool\n", True),
+        (["ipmitool"], "", False),
+        (["ipmitool"], "rc  ipmitool\n", False),
+        (["freeipmi-tools", "freeipmi-ipmiseld"], "ii  freeipmi-tools\n", False),
+        (
+            ["freeipmi-tools", "freeipmi-ipmiseld"],
+            "ii  freeipmi-tools\nii  freeipmi-ipmiseld\n",
+            True,
+        ),
+    ],
+)
+@mock.patch("hw_tools.subprocess.run")
+def test_check_deb_pkg_installed(mock_run, pkgs, dpkg_query_output, expect):
+    mock_run.return_value.stdout = dpkg_query_output
+    result = check_deb_pkg_installed(*pkgs)
+    assert result is expect
+    mock_run.assert_called_once_with(
+        ["dpkg-query", "--show", "--showformat=${db:Status-Abbrev} ${Package}\n", *pkgs],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        universal_newlines=True,
+        check=False,
+    )
 
 
 class TestSymlink(unittest.TestCase):
-    def test_symlink(self):
+    @mock.patch("hw_tools.os.replace")
+    @mock.patch("hw_tools.os.readlink", side_effect=FileNotFoundError())
+    def test_symlink(self, mock_readlink, mock_replace):
         mock_src = mock.Mock()
         mock_dst = mock.Mock()
+        mock_tmp = mock_dst.with_name.return_value
         symlink(src=mock_src, dst=mock_dst)
-        mock_dst.unlink.assert_called_with(missing_ok=True)
-        mock_dst.symlink_to.assert_called_with(mock_src)
+        mock_dst.with_name.assert_called_with(f"{mock_dst.name}.tmp")
+        mock_tmp.unlink.assert_called_with(missing_ok=True)
+        mock_tmp.symlink_to.assert_called_with(mock_src)
+        mock_replace.assert_called_with(mock_tmp, mock_dst)
+
+    def test_symlink_replace_existing(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            src = Path(tmp_dir) / "tool"
+            dst = Path(tmp_dir) / "link"
+            dst.symlink_to(Path(tmp_dir) / "old-tool")
+            symlink(src=src, dst=dst)
+            self.assertEqual(os.readlink(dst), str(src))
+            self.assertEqual(sorted(os.listdir(tmp_dir)), ["link"])
+
+    @mock.patch("hw_tools.os.readlink", return_value="/opt/tool")
+    def test_symlink_already_linked(self, mock_readlink):
+        mock_dst = mock.Mock()
+        symlink(src=Path("/opt/tool"), dst=mock_dst)
+        mock_readlink.assert_called_with(mock_dst)
+        mock_dst.with_name.assert_not_called()
 
-    def test_symlink_error_handling(self):
+    @mock.patch("hw_tools.os.replace")
+    @mock.patch("hw_tools.os.readlink", side_effect=FileNotFoundError())
+    def test_symlink_error_handling(self, mock_readlink, mock_replace):
         mock_src = mock.Mock()
         mock_dst = mock.Mock()
-        mock_dst.symlink_to.side_effect = OSError()
+        mock_tmp = mock_dst.with_name.return_value
+        mock_tmp.symlink_to.side_effect = OSError()
 
         with self.assertRaises(OSError):
             symlink(src=mock_src, dst=mock_dst)
 
-        mock_dst.unlink.assert_called_with(missing_ok=True)
-        mock_dst.symlink_to.assert_called_with(mock_src)
+        mock_tmp.unlink.assert_called_with(missing_ok=True)
+        mock_tmp.symlink_to.assert_called_with(mock_src)
+        mock_replace.assert_not_called()
 
 
 class TestMakeExecutable(unittest.TestCase):
@@ -136,6 +186,7 @@ class TestHWToolHelper(unittest.TestCase):
         strategies = self.hw_tool_helper.strategies
         for strategy in strategies:
             assert isinstance(strategy, (StrategyABC, TPRStrategyABC, APTStrategyABC))
+            assert str(strategy) == strategy.name.value
 
     def test_02_fetch_tools(self):
         """Check each hw_tools_tool has been fetched."""
@@ -419,7 +470,9 @@ class TestStorCLIStrategy(unittest.TestCase):
         strategy = StorCLIStrategy()
         with pytest.raises(ResourceChecksumError):
             strategy.install(mock_path)
-        mock_validate_checksum.assert_called_with(STORCLI_VERSION_INFOS, mock_path)
+        mock_validate_checksum.assert_called_with(
+            STORCLI_VERSION_INFOS, mock_path, strategy.checksum_stamp
+        )
         mock_install_deb.assert_not_called()
         mock_symlink.assert_not_called()
 
@@ -427,50 +480,71 @@ class TestStorCLIStrategy(unittest.TestCase):
     @mock.patch("hw_tools.remove_deb")
     def test_remove(self, mock_remove_deb, mock_symlink):
         strategy = StorCLIStrategy()
-        with mock.patch.object(strategy, "symlink_bin") as mock_symlink_bin:
+        with mock.patch.object(strategy, "symlink_bin") as mock_symlink_bin, mock.patch.object(
+            StorCLIStrategy, "checksum_stamp", new_callable=mock.PropertyMock
+        ) as mock_checksum_stamp:
             strategy.remove()
             mock_symlink_bin.unlink.assert_called_with(missing_ok=True)
+            mock_checksum_stamp.return_value.unlink.assert_called_with(missing_ok=True)
             mock_remove_deb.assert_called_with(pkg=strategy.name)
 
 
 class TestDeb(unittest.TestCase):
-    @mock.patch("hw_tools.subprocess")
-    def test_install_deb(self, mock_subprocess):
+    @mock.patch("hw_tools.subprocess.run")
+    def test_install_deb(self, mock_run):
+        mock_run.return_value.stdout = "dpkg output"
+        with self.assertLogs("hw_tools", level="DEBUG") as cm:
+            install_deb(name="name-a", path="path-a")
+        mock_run.assert_called_with(
+            ["dpkg", "-i", "path-a"],
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        )
+        self.assertIn("DEBUG:hw_tools:dpkg output", cm.output)
+
+    @mock.patch("hw_tools.logger.isEnabledFor", return_value=False)
+    @mock.patch("hw_tools.subprocess.run")
+    def test_install_deb_output_discarded(self, mock_run, _):
+        mock_run.return_value.stdout = None
         install_deb(name="name-a", path="path-a")
-        mock_subprocess.check_output.assert_called_with(
-            ["dpkg", "-i", "path-a"], universal_newlines=True
+        mock_run.assert_called_with(
+            ["dpkg", "-i", "path-a"],
+            stdout=subprocess.DEVNULL,
+            universal_newlines=True,
+            check=True,
         )
 
     @mock.patch(
-        "hw_tools.subprocess.check_output",
+        "hw_tools.subprocess.run",
         side_effect=subprocess.CalledProcessError(-1, "cmd"),
     )
-    def test_install_deb_error_handling(self, mock_subprocess_check_outpout):
+    def test_install_deb_error_handling(self, mock_run):
         """Check the error handling of install."""
         with self.assertRaises(apt.PackageError):
             install_deb(name="name-a", path="path-a")
-        mock_subprocess_check_outpout.assert_called_with(
-            ["dpkg", "-i", "path-a"], universal_newlines=True
+        mock_run.assert_called_with(
+            ["dpkg", "-i", "path-a"], stdout=mock.ANY, universal_newlines=True, check=True
         )
 
-    @mock.patch("hw_tools.subprocess")
-    def test_remove_deb(self, mock_subprocess):
+    @mock.patch("hw_tools.subprocess.run")
+    def test_remove_deb(self, mock_run):
         remove_deb(pkg="pkg-a")
-        mock_subprocess.check_output.assert_called_with(
-            ["dpkg", "--remove", "pkg-a"], universal_newlines=True
+        mock_run.assert_called_with(
+            ["dpkg", "--remove", "pkg-a"], stdout=mock.ANY, universal_newlines=True, check=True
         )
 
     @mock.patch(
-        "hw_tools.subprocess.check_output",
+        "hw_tools.subprocess.run",
         side_effect=subprocess.CalledProcessError(-1, "cmd"),
     )
-    def test_remove_deb_error_handling(self, mock_subprocess_check_outpout):
+    def test_remove_deb_error_handling(self, mock_run):
         """Check the error handling of install."""
         with self.assertRaises(apt.PackageError):
             remove_deb(pkg="pkg-a")
 
-        mock_subprocess_check_outpout.assert_called_with(
-            ["dpkg", "--remove", "pkg-a"], universal_newlines=True
+        mock_run.assert_called_with(
+            ["dpkg", "--remove", "pkg-a"], stdout=mock.ANY, universal_newlines=True, check=True
         )
 
 
@@ -481,6 +555,23 @@ class TestTPRStrategyABC(unittest.TestCase):
     def test_file_size_is_zero(self):
         self.assertTrue(file_is_empty(get_mock_path(size=0)))
 
+    def test_file_not_exists(self):
+        mock_path = mock.Mock()
+        mock_path.stat.side_effect = FileNotFoundError()
+        self.assertTrue(file_is_empty(mock_path))
+
+
+class TestFileIsExecutable:
+    @pytest.mark.parametrize("mode, expect", [(0o755, True), (0o100, True), (0o644, False)])
+    def test_file_is_executable(self, tmp_path, mode, expect):
+        target = tmp_path / "tool"
+        target.touch(mode=mode)
+        target.chmod(mode)
+        assert file_is_executable(target) is expect
+
+    def test_file_not_exists(self, tmp_path):
+        assert file_is_executable(tmp_path / "tool") is False
+
 
 class TestSAS2IRCUStrategy(unittest.TestCase):
     @mock.patch("hw_tools.validate_checksum", return_value=True)
@@ -520,15 +611,20 @@ class TestSAS2IRCUStrategy(unittest.TestCase):
         strategy = SAS2IRCUStrategy()
         with pytest.raises(ResourceChecksumError):
             strategy.install(mock_path)
-        mock_validate_checksum.assert_called_with(SAS2IRCU_VERSION_INFOS, mock_path)
+        mock_validate_checksum.assert_called_with(
+            SAS2IRCU_VERSION_INFOS, mock_path, strategy.checksum_stamp
+        )
         mock_install_deb.assert_not_called()
         mock_symlink.assert_not_called()
 
     def test_remove(self):
         strategy = SAS2IRCUStrategy()
-        with mock.patch.object(strategy, "symlink_bin") as mock_symlink_bin:
+        with mock.patch.object(strategy, "symlink_bin") as mock_symlink_bin, mock.patch.object(
+            SAS2IRCUStrategy, "checksum_stamp", new_callable=mock.PropertyMock
+        ) as mock_checksum_stamp:
             strategy.remove()
             mock_symlink_bin.unlink.assert_called_with(missing_ok=True)
+            mock_checksum_stamp.return_value.unlink.assert_called_with(missing_ok=True)
 
 
 class TestSAS3IRCUStrategy(unittest.TestCase):
@@ -569,15 +665,20 @@ class TestSAS3IRCUStrategy(unittest.TestCase):
         strategy = SAS3IRCUStrategy()
         with pytest.raises(ResourceChecksumError):
             strategy.install(mock_path)
-        mock_validate_checksum.assert_called_with(SAS3IRCU_VERSION_INFOS, mock_path)
+        mock_validate_checksum.assert_called_with(
+            SAS3IRCU_VERSION_INFOS, mock_path, strategy.checksum_stamp
+        )
         mock_install_deb.assert_not_called()
         mock_symlink.assert_not_called()
 
     def test_remove(self):
         strategy = SAS3IRCUStrategy()
-        with mock.patch.object(strategy, "symlink_bin") as mock_symlink_bin:
+        with mock.patch.object(strategy, "symlink_bin") as mock_symlink_bin, mock.patch.object(
+            SAS3IRCUStrategy, "checksum_stamp", new_callable=mock.PropertyMock
+        ) as mock_checksum_stamp:
             strategy.remove()
             mock_symlink_bin.unlink.assert_called_with(missing_ok=True)
+            mock_checksum_stamp.return_value.unlink.assert_called_with(missing_ok=True)
 
 
 class TestPercCLIStrategy(unittest.TestCase):
@@ -624,7 +725,9 @@ class TestPercCLIStrategy(unittest.TestCase):
         strategy = PercCLIStrategy()
         with pytest.raises(ResourceChecksumError):
             strategy.install(mock_path)
-        mock_validate_checksum.assert_called_with(PERCCLI_VERSION_INFOS, mock_path)
+        mock_validate_checksum.assert_called_with(
+            PERCCLI_VERSION_INFOS, mock_path, strategy.checksum_stamp
+        )
         mock_install_deb.assert_not_called()
         mock_symlink.assert_not_called()
 
@@ -632,15 +735,19 @@ class TestPercCLIStrategy(unittest.TestCase):
     @mock.patch("hw_tools.remove_deb")
     def test_remove(self, mock_remove_deb, mock_symlink):
         strategy = PercCLIStrategy()
-        with mock.patch.object(strategy, "symlink_bin") as mock_symlink_bin:
+        with mock.patch.object(strategy, "symlink_bin") as mock_symlink_bin, mock.patch.object(
+            PercCLIStrategy, "checksum_stamp", new_callable=mock.PropertyMock
+        ) as mock_checksum_stamp:
             strategy.remove()
             mock_symlink_bin.unlink.assert_called_with(missing_ok=True)
+            mock_checksum_stamp.return_value.unlink.assert_called_with(missing_ok=True)
             mock_remove_deb.assert_called_with(pkg=strategy.name)
 
 
 class TestSSACLIStrategy(unittest.TestCase):
+    @mock.patch("hw_tools.Path.exists", return_value=False)
     @mock.patch("hw_tools.apt")
-    def test_install(self, mock_apt):
+    def test_install(self, mock_apt, mock_path_exists):
         strategy = SSACLIStrategy()
         mock_repos = mock.Mock()
         mock_apt.RepositoryMapping.return_value = mock_repos
@@ -652,6 +759,20 @@ class TestSSACLIStrategy(unittest.TestCase):
 
         mock_apt.add_package.assert_called_with("ssacli", update_cache=True)
 
+    @mock.patch("hw_tools.Path.exists", return_value=True)
+    @mock.patch("hw_tools.apt")
+    def test_install_keys_already_imported(self, mock_apt, mock_path_exists):
+        strategy = SSACLIStrategy()
+        mock_repos = mock.Mock()
+        mock_apt.RepositoryMapping.return_value = mock_repos
+
+        strategy.install()
+        mock_apt.import_key.assert_not_called()
+        self.assertEqual(mock_path_exists.call_count, len(HP_KEYS))
+        self.assertCountEqual(HP_KEYS_FINGERPRINT, HP_KEYS)
+        mock_repos.add.assert_called_with(strategy.repo)
+        mock_apt.add_package.assert_called_with("ssacli", update_cache=True)
+
     @mock.patch("hw_tools.apt")
     def test_remove(self, mock_apt):
         strategy = SSACLIStrategy()
@@ -726,28 +847,83 @@ class TestIPMIDCMIStrategy(unittest.TestCase):
         mock_apt.remove_package.assert_not_called()
 
 
+@pytest.fixture
+def clear_detect_available_tools():
+    detect_available_tools.cache_clear()
+    yield
+    detect_available_tools.cache_clear()
+
+
+@pytest.mark.usefixtures("clear_detect_available_tools")
+@mock.patch("hw_tools.is_virtual_machine", return_value=False)
 @mock.patch("hw_tools.disk_hw_verifier", return_value={7, 8, 9})
 @mock.patch("hw_tools.bmc_hw_verifier", return_value={1, 2, 3})
 @mock.patch("hw_tools.raid_hw_verifier", return_value={4, 5, 6})
 @mock.patch("hw_tools.nvidia_gpu_verifier", return_value={10, 11, 12})
 def test_detect_available_tools(
-    mock_raid_verifier, mock_bmc_hw_verifier, mock_disk_hw_verifier, mock_nvidia_gpu_verifier
+    mock_nvidia_gpu_verifier,
+    mock_raid_verifier,
+    mock_bmc_hw_verifier,
+    mock_disk_hw_verifier,
+    mock_is_virtual_machine,
 ):
     output = detect_available_tools()
-    mock_raid_verifier.assert_called()
+    # the result is cached and can't be modified by the callers
+    assert detect_available_tools() is output
+    assert isinstance(output, frozenset)
+    mock_raid_verifier.assert_called_once()
     mock_bmc_hw_verifier.assert_called()
     mock_disk_hw_verifier.assert_called()
     mock_nvidia_gpu_verifier.assert_called()
     assert output == {1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12}
 
 
+@pytest.mark.usefixtures("clear_detect_available_tools")
+@mock.patch("hw_tools.is_virtual_machine", return_value=True)
+@mock.patch("hw_tools.disk_hw_verifier", return_value={7, 8, 9})
+@mock.patch("hw_tools.bmc_hw_verifier", return_value={1, 2, 3})
+@mock.patch("hw_tools.raid_hw_verifier", return_value={4, 5, 6})
+@mock.patch("hw_tools.nvidia_gpu_verifier", return_value={10, 11, 12})
+def test_detect_available_tools_virtual_machine(
+    mock_nvidia_gpu_verifier,
+    mock_raid_verifier,
+    mock_bmc_hw_verifier,
+    mock_disk_hw_verifier,
+    mock_is_virtual_machine,
+):
+    output = detect_available_tools()
+    mock_bmc_hw_verifier.assert_not_called()
+    assert output == {4, 5, 6, 7, 8, 9, 10, 11, 12}
+
+
+@mock.patch("hw_tools.lshw", return_value=[{"id": "raid"}])
 @mock.patch("hw_tools._raid_hw_verifier_hwinfo", return_value={4, 5, 6})
 @mock.patch("hw_tools._raid_hw_verifier_lshw", return_value={1, 2, 3, 4})
-def test_raid_hw_verifier(mock_hw_verifier_lshw, mock_hw_verifier_hwinfo):
+def test_raid_hw_verifier(mock_hw_verifier_lshw, mock_hw_verifier_hwinfo, mock_lshw):
     output = raid_hw_verifier()
     assert output == {4, 5, 6, 1, 2, 3, 4}
 
 
+@mock.patch("hw_tools.lshw", return_value=[{"id": "raid"}])
+@mock.patch("hw_tools._raid_hw_verifier_hwinfo")
+@mock.patch("hw_tools._raid_hw_verifier_lshw", return_value={HWTool.SSACLI})
+def test_raid_hw_verifier_skip_hwinfo(mock_hw_verifier_lshw, mock_hw_verifier_hwinfo, mock_lshw):
+    output = raid_hw_verifier()
+    assert output == {HWTool.SSACLI}
+    mock_hw_verifier_hwinfo.assert_not_called()
+
+
+@mock.patch("hw_tools.lshw", return_value=[])
+@mock.patch("hw_tools._raid_hw_verifier_hwinfo")
+@mock.patch("hw_tools._raid_hw_verifier_lshw")
+def test_raid_hw_verifier_no_storage(mock_hw_verifier_lshw, mock_hw_verifier_hwinfo, mock_lshw):
+    output = raid_hw_verifier()
+    assert output == set()
+    mock_lshw.assert_called_once_with(class_filter="storage")
+    mock_hw_verifier_lshw.assert_not_called()
+    mock_hw_verifier_hwinfo.assert_not_called()
+
+
 @pytest.mark.parametrize(
     "lshw_output, lshw_storage_output, expect",
     [
@@ -954,16 +1130,23 @@ def test_nvidia_gpu_verifier(mock_lshw, mock_driver_path, lshw_output, driver_lo
 
 
 class TestIPMIHWVerifier(unittest.TestCase):
-    @mock.patch("hw_tools.requests.get")
-    @mock.patch("hw_tools.get_bmc_address", return_value="1.2.3.4")
-    def test_redfish_available(self, mock_bmc_address, mock_requests_get):
+    def setUp(self):
+        get_bmc_address_patcher = mock.patch("hw_tools.get_bmc_address", return_value="1.2.3.4")
+        self.mock_get_bmc_address = get_bmc_address_patcher.start()
+        self.addCleanup(get_bmc_address_patcher.stop)
+
+    @mock.patch("hw_tools._REDFISH_SESSION.get")
+    def test_redfish_available(self, mock_requests_get):
         mock_response = mock.Mock()
         mock_response.json.return_value = {"some_key": "some_value"}
         mock_requests_get.return_value = mock_response
 
-        result = redfish_available()
+        result = redfish_available("1.2.3.4")
         self.assertEqual(result, True)
-        mock_bmc_address.assert_called()
+        mock_requests_get.assert_called_once_with(
+            "https://1.2.3.4:443/redfish/v1/", verify=False, timeout=(5, 10)
+        )
+        mock_response.close.assert_called_once()
 
     @parameterized.expand(
         [
@@ -972,69 +1155,143 @@ class TestIPMIHWVerifier(unittest.TestCase):
             (Exception),
         ]
     )
-    @mock.patch("hw_tools.requests.get")
-    @mock.patch("hw_tools.get_bmc_address", return_value="1.2.3.4")
-    def test_redfish_not_available(self, test_except_class, mock_bmc_address, mock_requests_get):
+    @mock.patch("hw_tools._REDFISH_SESSION.get")
+    def test_redfish_not_available(self, test_except_class, mock_requests_get):
         mock_response = mock.Mock()
         mock_response.raise_for_status.side_effect = test_except_class()
         mock_requests_get.return_value = mock_response
 
-        result = redfish_available()
+        result = redfish_available("1.2.3.4")
         self.assertEqual(result, False)
-        mock_bmc_address.assert_called_once()
 
-    @mock.patch("hw_tools.requests.get")
-    @mock.patch("hw_tools.get_bmc_address", return_value="1.2.3.4")
-    def test_redfish_not_available_bad_response(self, mock_bmc_address, mock_requests_get):
+    @mock.patch("hw_tools._REDFISH_SESSION.get")
+    def test_redfish_not_available_bad_response(self, mock_requests_get):
         mock_response = mock.Mock()
         mock_response.json.return_value = {}
         mock_requests_get.return_value = mock_response
 
-        result = redfish_available()
+        result = redfish_available("1.2.3.4")
         self.assertEqual(result, False)
-        mock_bmc_address.assert_called_once()
 
+    @mock.patch("hw_tools._REDFISH_SESSION.get")
+    def test_redfish_not_available_no_bmc_address(self, mock_requests_get):
+        result = redfish_available(None)
+        self.assertEqual(result, False)
+        mock_requests_get.assert_not_called()
+
+    @mock.patch("hw_tools._installed_deb_pkgs", return_value=set())
     @mock.patch("hw_tools.redfish_available", return_value=True)
     @mock.patch("hw_tools.subprocess")
     @mock.patch("hw_tools.apt_helpers")
-    def test_bmc_hw_verifier(self, mock_apt_helpers, mock_subprocess, mock_redfish_available):
+    def test_bmc_hw_verifier(
+        self, mock_apt_helpers, mock_subprocess, mock_redfish_available, mock_check_installed
+    ):
         output = bmc_hw_verifier()
         mock_apt_helpers.add_pkg_with_candidate_version.assert_called_with("freeipmi-tools")
+        self.mock_get_bmc_address.assert_called_once()
+        mock_redfish_available.assert_called_once_with("1.2.3.4")
+        mock_subprocess.run.assert_any_call(
+            ["ipmi-sel"],
+            stdout=mock_subprocess.DEVNULL,
+            stderr=mock_subprocess.DEVNULL,
+            check=True,
+            timeout=120,
+        )
         self.assertCountEqual(
             output, [HWTool.IPMI_SENSOR, HWTool.IPMI_SEL, HWTool.IPMI_DCMI, HWTool.REDFISH]
         )
 
+    @mock.patch("hw_tools._installed_deb_pkgs", return_value=set())
     @mock.patch("hw_tools.redfish_available", return_value=False)
     @mock.patch(
-        "hw_tools.subprocess.check_output",
+        "hw_tools.subprocess.run",
         side_effect=subprocess.CalledProcessError(-1, "cmd"),
     )
     @mock.patch("hw_tools.apt_helpers")
     def test_bmc_hw_verifier_error_handling(
-        self, mock_apt_helpers, mock_check_output, mock_redfish_available
+        self, mock_apt_helpers, mock_subprocess_run, mock_redfish_available, mock_check_installed
     ):
         output = bmc_hw_verifier()
         mock_apt_helpers.add_pkg_with_candidate_version.assert_called_with("freeipmi-tools")
         self.assertEqual(output, set())
 
+    @mock.patch("hw_tools._installed_deb_pkgs", return_value=set())
     @mock.patch("hw_tools.redfish_available", return_value=False)
     @mock.patch("hw_tools.apt_helpers")
-    def test_bmc_hw_verifier_mixed(self, mock_apt_helpers, mock_redfish_available):
+    def test_bmc_hw_verifier_mixed(
+        self, mock_apt_helpers, mock_redfish_available, mock_check_installed
+    ):
         """Test a mixture of failures and successes for ipmi."""
 
-        def mock_get_response_ipmi(ipmi_call):
+        def mock_get_response_ipmi(ipmi_call, **kwargs):
             if ipmi_call == "ipmimonitoring --sdr-cache-recreate".split():
                 pass
-            elif ipmi_call == "ipmi-sel --sdr-cache-recreate".split():
+            elif ipmi_call == ["ipmi-sel"]:
                 pass
             elif ipmi_call == "ipmi-dcmi --get-system-power-statistics".split():
                 raise subprocess.CalledProcessError(-1, "cmd")
 
-        with mock.patch("hw_tools.subprocess.check_output", side_effect=mock_get_response_ipmi):
+        with mock.patch("hw_tools.subprocess.run", side_effect=mock_get_response_ipmi):
             output = bmc_hw_verifier()
             mock_apt_helpers.add_pkg_with_candidate_version.assert_called_with("freeipmi-tools")
             self.assertCountEqual(output, [HWTool.IPMI_SENSOR, HWTool.IPMI_SEL])
 
+    @mock.patch("hw_tools._installed_deb_pkgs", return_value=set())
+    @mock.patch("hw_tools.redfish_available", return_value=False)
+    @mock.patch("hw_tools.apt_helpers")
+    def test_bmc_hw_verifier_timeout(
+        self, mock_apt_helpers, mock_redfish_available, mock_check_installed
+    ):
+        """Test the ipmi probes timing out."""
+
+        def mock_get_response_ipmi(ipmi_call, **kwargs):
+            if ipmi_call == ["ipmi-sel"]:
+                raise subprocess.TimeoutExpired(ipmi_call, kwargs["timeout"])
+
+        with mock.patch("hw_tools.subprocess.run", side_effect=mock_get_response_ipmi):
+            output = bmc_hw_verifier()
+            mock_apt_helpers.add_pkg_with_candidate_version.assert_called_with("freeipmi-tools")
+            self.assertCountEqual(output, [HWTool.IPMI_SENSOR, HWTool.IPMI_DCMI])
+
+    @mock.patch("hw_tools._installed_deb_pkgs", return_value=set())
+    @mock.patch("hw_tools.redfish_available", return_value=False)
+    @mock.patch("hw_tools.apt_helpers")
+    def test_bmc_hw_verifier_sensor_failed(
+        self, mock_apt_helpers, mock_redfish_available, mock_check_installed
+    ):
+        """Test the SDR cache is rebuilt again if the sensor probe failed."""
+
+        def mock_get_response_ipmi(ipmi_call, **kwargs):
+            if ipmi_call == "ipmimonitoring --sdr-cache-recreate".split():
+                raise subprocess.CalledProcessError(-1, "cmd")
+            if ipmi_call == ["ipmi-sel"]:
+                raise subprocess.CalledProcessError(-1, "SDR cache out of date")
+
+        with mock.patch(
+            "hw_tools.subprocess.run", side_effect=mock_get_response_ipmi
+        ) as mock_subprocess_run:
+            output = bmc_hw_verifier()
+            mock_subprocess_run.assert_any_call(
+                ["ipmi-sel", "--sdr-cache-recreate"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=True,
+                timeout=120,
+            )
+            self.assertCountEqual(output, [HWTool.IPMI_SEL, HWTool.IPMI_DCMI])
+
+    @mock.patch("hw_tools._installed_deb_pkgs", return_value={"freeipmi-tools"})
+    @mock.patch("hw_tools.redfish_available", return_value=False)
+    @mock.patch("hw_tools.subprocess.run")
+    @mock.patch("hw_tools.apt_helpers")
+    def test_bmc_hw_verifier_freeipmi_installed(
+        self, mock_apt_helpers, mock_subprocess_run, mock_redfish_available, mock_check_installed
+    ):
+        output = bmc_hw_verifier()
+        mock_check_installed.assert_called_once_with("freeipmi-tools")
+        mock_apt_helpers.add_pkg_with_candidate_version.assert_not_called()
+        self.assertCountEqual(output, [HWTool.IPMI_SENSOR, HWTool.IPMI_SEL, HWTool.IPMI_DCMI])
+
 
 @pytest.fixture
 def snap_exporter():
@@ -1051,9 +1308,11 @@ def snap_exporter():
 
 @pytest.fixture
 def mock_snap_lib():
+    _snap_cache.cache_clear()
     with mock.patch("hw_tools.snap") as mock_snap:
         yield mock_snap
     mock_snap.reset_mock()
+    _snap_cache.cache_clear()
 
 
 def test_snap_strategy_name(snap_exporter):
@@ -1071,6 +1330,19 @@ def test_snap_strategy_install_success(snap_exporter, mock_snap_lib):
     )
 
 
+def test_snap_strategy_snap_cache_reused(snap_exporter, mock_snap_lib):
+    snap_exporter.check()
+    snap_exporter.check()
+    mock_snap_lib.SnapCache.assert_called_once()
+
+    # installing or removing a snap invalidates the cache
+    snap_exporter.install()
+    snap_exporter.check()
+    snap_exporter.remove()
+    snap_exporter.check()
+    assert mock_snap_lib.SnapCache.call_count == 3
+
+
 def test_snap_strategy_install_fail(snap_exporter, mock_snap_lib):
     mock_snap_lib.add.side_effect = ValueError
 
@@ -1239,9 +1511,9 @@ def test_remove_legacy_smartctl_exporter_exist(
 
     mock_systemd.service_stop.assert_called_once()
     mock_systemd.service_disable.assert_called_once()
-    mock_path_unlink.assert_called()
+    mock_path_unlink.assert_has_calls([mock.call(), mock.call(missing_ok=True)])
     assert mock_path_unlink.call_count == 2
-    mock_shutil.rmtree.assert_called_once()
+    mock_shutil.rmtree.assert_called_once_with("/opt/SmartCtlExporter/", ignore_errors=True)
 
 
 @mock.patch("hw_tools.Path.unlink")
@@ -1256,5 +1528,5 @@ def test_remove_legacy_smartctl_exporter_not_exists(
 
     mock_systemd.service_stop.assert_not_called()
     mock_systemd.service_disable.assert_not_called()
-    mock_path_unlink.assert_not_called()
-    mock_shutil.rmtree.assert_not_called()
+    mock_path_unlink.assert_called_once_with(missing_ok=True)
+    mock_shutil.rmtree.assert_called_once_with("/opt/SmartCtlExporter/", ignore_errors=True)